@@ -0,0 +1,113 @@
+"""
+Throughput benchmark of the CPU/IO-aware node executor.
+
+Each synthetic document runs a CPU-bound stage (base64 + compression + JSON
+parsing of a payload the size of a rasterized page) followed by an IO-bound
+stage (a blocking wait standing in for the vision/LLM call). The baseline runs
+both stages in a single thread pool, the executor dispatches the CPU stage to
+the process pool and the IO stage to the IO thread pool.
+
+The stages are synthetic and do not match the graph nodes: in the graph the
+base64 encoding is streamed by analyze_document on the IO thread pool and the
+CPU-bound node only extracts text or rasterizes PDFs. The numbers measure the
+executor, not the speedup of the document graph.
+
+Usage:
+    python benchmarks/executor_benchmark.py --documents 64 --io-latency 0.2
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agent.executor import async_node, configure_executors, cpu_bound, io_bound, shutdown_executors  # noqa: E402
+
+PAYLOAD = os.urandom(2 * 1024 * 1024)
+
+
+@cpu_bound
+def cpu_stage(state: dict):
+    encoded = base64.b64encode(PAYLOAD[state["rounds"]:])
+    compressed = zlib.compress(encoded, 6)
+    parsed = json.loads(json.dumps({"size": len(compressed), "data": encoded[:65536].decode()}))
+    return {"size": parsed["size"]}
+
+
+@io_bound
+def io_stage(state: dict):
+    time.sleep(state["io_latency"])
+    return {"done": True}
+
+
+def run_baseline(documents: int, io_latency: float) -> float:
+    """
+    Run both stages of every document in one thread pool (one thread per document), return docs/s
+    """
+    def pipeline(i):
+        state = {"rounds": i % 8, "io_latency": io_latency}
+        cpu_stage(state)
+        io_stage(state)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(documents, 1)) as pool:
+        list(pool.map(pipeline, range(documents)))
+    return documents / (time.perf_counter() - start)
+
+
+async def _run_executor(documents: int, io_latency: float):
+    cpu_node = async_node(cpu_stage)
+    io_node = async_node(io_stage)
+
+    async def pipeline(i):
+        state = {"rounds": i % 8, "io_latency": io_latency}
+        await cpu_node(state)
+        await io_node(state)
+
+    await asyncio.gather(*(pipeline(i) for i in range(documents)))
+
+
+def run_executor(documents: int, workers: int, io_latency: float) -> float:
+    """
+    Run the stages through the CPU/IO executor, return docs/s
+    """
+    configure_executors(cpu_workers=workers, io_workers=max(documents, 1))
+    # Warm up the process pool so worker startup is not measured
+    asyncio.run(_run_executor(workers, 0))
+    start = time.perf_counter()
+    asyncio.run(_run_executor(documents, io_latency))
+    elapsed = time.perf_counter() - start
+    shutdown_executors()
+    return documents / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=64)
+    parser.add_argument("--io-latency", type=float, default=0.2)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    workers = 1
+    worker_counts = []
+    while workers < args.max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(args.max_workers)
+
+    baseline = run_baseline(args.documents, args.io_latency)
+    print(f"baseline (single thread pool): {baseline:.2f} docs/s")  # noqa: T201
+    print(f"{'cpu workers':>11} {'executor docs/s':>16} {'speedup':>8}")  # noqa: T201
+    for workers in worker_counts:
+        executor = run_executor(args.documents, workers, args.io_latency)
+        print(f"{workers:>11} {executor:>16.2f} {executor / baseline:>7.2f}x")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
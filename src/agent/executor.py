@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os import getenv
+
+# Enable dispatching of marked nodes when the graph runs with ainvoke/astream
+NODE_EXECUTOR_ENABLED = getenv("NODE_EXECUTOR", "false").lower() in ("1", "true", "yes")
+
+_cpu_workers = int(getenv("NODE_CPU_WORKERS", str(os.cpu_count() or 1)))
+_io_workers = int(getenv("NODE_IO_WORKERS", "32"))
+_process_pool = None
+_thread_pool = None
+
+
+def cpu_bound(fn):
+    """
+    Mark a node as CPU-bound, it runs in the process pool.
+    The function is returned unchanged so it can still be pickled by name.
+    """
+    fn.execution_kind = "cpu"
+    return fn
+
+
+def io_bound(fn):
+    """
+    Mark a node as IO-bound, it runs off the asyncio loop in the IO thread pool
+    """
+    fn.execution_kind = "io"
+    return fn
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared process pool for CPU-bound nodes, sized to the cores
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=_cpu_workers)
+    return _process_pool
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Return the shared thread pool for blocking IO-bound nodes
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=_io_workers, thread_name_prefix="io-node")
+    return _thread_pool
+
+
+def configure_executors(cpu_workers: int = None, io_workers: int = None):
+    """
+    Resize the pools, running pools are shut down and recreated on next use
+    """
+    global _cpu_workers, _io_workers
+    shutdown_executors()
+    if cpu_workers is not None:
+        _cpu_workers = cpu_workers
+    if io_workers is not None:
+        _io_workers = io_workers
+
+
+def shutdown_executors():
+    """
+    Shut down the shared pools
+    """
+    global _process_pool, _thread_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown()
+        _thread_pool = None
+
+
+def async_node(fn):
+    """
+    Async wrapper dispatching a marked node to the pool of its execution kind
+    """
+    kind = getattr(fn, "execution_kind", None)
+    if kind == "cpu":
+        @functools.wraps(fn)
+        async def cpu_node(state):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_process_pool(), fn, state)
+        return cpu_node
+
+    @functools.wraps(fn)
+    async def io_node(state):
+        loop = asyncio.get_running_loop()
+        # Propagar el contexto (config de langgraph, tracing) al hilo
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(get_thread_pool(), functools.partial(context.run, fn, state))
+    return io_node
+
+
+def as_node(fn, enabled: bool = None):
+    """
+    Wrap a marked node so it is dispatched according to its execution kind.
+
+    The node is registered with both entry points: graph.invoke runs the
+    function inline as before, graph.ainvoke/astream dispatch CPU-bound
+    nodes to the process pool and IO-bound nodes to the IO thread pool.
+    Unmarked nodes, or all nodes when the executor is disabled, are
+    returned unchanged.
+
+    Args:
+        fn: Node function, optionally marked with cpu_bound/io_bound
+        enabled: Override NODE_EXECUTOR
+
+    Returns:
+        Node function or runnable to add to the graph
+    """
+    enabled = NODE_EXECUTOR_ENABLED if enabled is None else enabled
+    if not enabled or getattr(fn, "execution_kind", None) is None:
+        return fn
+
+    from langgraph.utils.runnable import RunnableCallable
+
+    return RunnableCallable(fn, async_node(fn), name=fn.__name__)
@@ -1,14 +1,15 @@
 from src.agent.state import OverallState, OverallStateOutput, OverallStateInput
 from langgraph.graph import StateGraph, START, END
 from src.agent.nodes import encode_file_to_base64, analyze_document, review_quality, human_feedback, format_entities, format_individuals, format_company, proxy_node
+from src.agent.executor import as_node
 
 
 subgraph = StateGraph(OverallState, input=OverallStateInput, output=OverallStateOutput)
 
-# Add nodes
-subgraph.add_node('encode_file', encode_file_to_base64)
-subgraph.add_node('analyze_document', analyze_document)
-subgraph.add_node('review_quality', review_quality)
+# Add nodes (CPU/IO-bound nodes are dispatched to their pool when NODE_EXECUTOR is enabled)
+subgraph.add_node('encode_file', as_node(encode_file_to_base64))
+subgraph.add_node('analyze_document', as_node(analyze_document))
+subgraph.add_node('review_quality', as_node(review_quality))
 subgraph.add_node('human_feedback', human_feedback)
 
 # Add edges
@@ -21,25 +22,46 @@ subgraph.add_edge('review_quality', 'human_feedback')
 # Compilar el subgrafo
 compiled_subgraph = subgraph.compile()
 
-# Actualizar el workflow principal
-workflow = StateGraph(OverallState, input=OverallStateInput, output=OverallStateOutput)
-
-# Eliminar los nodos del subgrafo del workflow principal
-workflow.add_node('format_entities', format_entities)
-workflow.add_node('format_individuals', format_individuals)
-workflow.add_node('format_company', format_company)
-workflow.add_node('proxy_node', proxy_node)
-# Crear un nuevo nodo en el workflow principal que ejecuta el subgraph compilado
-workflow.add_node('document_processing', compiled_subgraph)
-
-# Actualizar las conexiones
-workflow.add_edge(START, 'document_processing')
-workflow.add_edge('document_processing', 'proxy_node')
-workflow.add_edge('proxy_node', 'format_entities')
-workflow.add_edge('proxy_node', 'format_individuals') 
-workflow.add_edge('proxy_node', 'format_company')
-workflow.add_edge('format_entities', END)
-workflow.add_edge('format_individuals', END)
-workflow.add_edge('format_company', END)
-
-graph = workflow.compile()
\ No newline at end of file
+def build_workflow(document_subgraph):
+    """
+    Build the main workflow around a compiled document processing subgraph
+    """
+    # Actualizar el workflow principal
+    workflow = StateGraph(OverallState, input=OverallStateInput, output=OverallStateOutput)
+
+    # Eliminar los nodos del subgrafo del workflow principal
+    workflow.add_node('format_entities', format_entities)
+    workflow.add_node('format_individuals', format_individuals)
+    workflow.add_node('format_company', format_company)
+    workflow.add_node('proxy_node', proxy_node)
+    # Crear un nuevo nodo en el workflow principal que ejecuta el subgraph compilado
+    workflow.add_node('document_processing', document_subgraph)
+
+    # Actualizar las conexiones
+    workflow.add_edge(START, 'document_processing')
+    workflow.add_edge('document_processing', 'proxy_node')
+    workflow.add_edge('proxy_node', 'format_entities')
+    workflow.add_edge('proxy_node', 'format_individuals')
+    workflow.add_edge('proxy_node', 'format_company')
+    workflow.add_edge('format_entities', END)
+    workflow.add_edge('format_individuals', END)
+    workflow.add_edge('format_company', END)
+    return workflow
+
+workflow = build_workflow(compiled_subgraph)
+
+graph = workflow.compile()
+
+# Subgrafo no interactivo para lotes y workers: human_feedback usa interrupt(),
+# que detiene graph.invoke antes de producir la salida
+batch_subgraph = StateGraph(OverallState, input=OverallStateInput, output=OverallStateOutput)
+batch_subgraph.add_node('encode_file', as_node(encode_file_to_base64))
+batch_subgraph.add_node('analyze_document', as_node(analyze_document))
+batch_subgraph.add_node('review_quality', as_node(review_quality))
+batch_subgraph.add_edge(START, 'encode_file')
+batch_subgraph.add_edge('encode_file', 'analyze_document')
+batch_subgraph.add_edge('analyze_document', 'review_quality')
+batch_subgraph.add_edge('review_quality', END)
+
+# Grafo sin revisión humana, para graph.invoke en procesamiento por lotes
+batch_graph = build_workflow(batch_subgraph.compile()).compile()
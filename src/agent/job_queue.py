@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from os import getenv
+from typing import Any, Dict, List, Optional
+
+from .scheduler import PRIORITIES
+
+DEFAULT_DB_PATH = getenv("JOB_QUEUE_DB", "jobs.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, available_at, created_at);
+"""
+
+# Job status values
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+
+@dataclass
+class QueuedJob:
+    """Job claimed from the durable queue"""
+    id: str
+    file_path: str
+    tenant: str
+    priority: int
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """
+    Durable job queue backed by SQLite.
+
+    Workers claim jobs with a lease; a job whose lease expires (worker crash)
+    is claimed again. Failed jobs are retried with exponential backoff and
+    moved to the dead-letter status after `max_attempts`.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, retry_backoff: float = 30):
+        self.db_path = db_path
+        self.retry_backoff = retry_backoff
+        # isolation_level=None: transactions are handled explicitly
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def submit(self, file_path: str, tenant: str = "default", priority: str = "standard", max_attempts: int = 3) -> str:
+        """
+        Queue a document and return the job id
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority}, expected one of {list(PRIORITIES)}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO jobs (id, file_path, tenant, priority, status, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, file_path, tenant, PRIORITIES[priority], QUEUED, max_attempts, now, now, now),
+        )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[QueuedJob]:
+        """
+        Claim the next available job with a lease, None if the queue is empty
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases without attempts left go to the dead-letter status
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, last_error = 'lease expired', lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (DEAD, now, RUNNING, now),
+            )
+            row = self._conn.execute(
+                "SELECT * FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) "
+                "ORDER BY priority, created_at, rowid LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, now, row["id"]),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        return QueuedJob(
+            id=row["id"],
+            file_path=row["file_path"],
+            tenant=row["tenant"],
+            priority=row["priority"],
+            attempts=row["attempts"] + 1,
+            max_attempts=row["max_attempts"],
+        )
+
+    def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a running job, False if the lease was lost
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+            (now + lease_seconds, now, job_id, worker_id, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Any = None) -> bool:
+        """
+        Mark a job as done and store its result, False if the lease was lost (result discarded)
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), now, job_id, worker_id, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Retry a failed job with exponential backoff, or dead-letter it when out of attempts.
+        False if the lease was lost and the failure was not recorded.
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?",
+                (job_id, worker_id, RUNNING),
+            ).fetchone()
+            if row is not None:
+                if row["attempts"] >= row["max_attempts"]:
+                    status, available_at = DEAD, now
+                else:
+                    status, available_at = QUEUED, now + self.retry_backoff * 2 ** (row["attempts"] - 1)
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                    (status, available_at, error, now, job_id),
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def requeue_dead(self) -> int:
+        """
+        Move dead-letter jobs back to the queue with fresh attempts
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+            (QUEUED, now, now, DEAD),
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs by status
+        """
+        rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Job row as a dict, None if not found
+        """
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Most recently updated jobs, optionally filtered by status
+        """
+        query = "SELECT id, file_path, tenant, status, attempts, last_error, updated_at FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        return [dict(row) for row in self._conn.execute(query, params + (limit,)).fetchall()]
@@ -1,24 +1,32 @@
+import hashlib
+import logging
 import requests
-import io
-import base64
-import json
+import tempfile
+from contextlib import suppress
 from dotenv import load_dotenv
-from os import getenv, path
+from os import getenv, makedirs, path, remove, replace
 from pdf2image import convert_from_path
+from pypdf import PdfReader
 from src.agent.utils import process_json_response, format_interrupt_message
-from src.agent.prompts import OCR_PROMPT, QUALITY_ASSURANCE_PROMPT
+from src.agent.prompts import OCR_PROMPT, TEXT_EXTRACTION_PROMPT, QUALITY_ASSURANCE_PROMPT
+from src.agent.request_body import StreamingChatBody
 from langgraph.types import interrupt, Command
 from typing import Literal
 from langchain_deepseek import ChatDeepSeek
 from langchain_core.rate_limiters import InMemoryRateLimiter
 from langgraph.graph import END
 from .state import OverallState
+from .validation import get_structured_llm, validate_extraction
+from .executor import cpu_bound, io_bound
+from .profiling import profiled
 
 load_dotenv()   
 
-# Rate limiter configuration
+logger = logging.getLogger(__name__)
+
+# Rate limiter configuration (per process, the worker daemon splits the budget between processes)
 rate_limiter = InMemoryRateLimiter(
-    requests_per_second=4,
+    requests_per_second=float(getenv("LLM_REQUESTS_PER_SECOND", "4")),
     check_every_n_seconds=0.1,
     max_bucket_size=10,
 )
@@ -33,72 +41,145 @@ llm = ChatDeepSeek(
     temperature=0,
     rate_limiter=rate_limiter
 )
+
+def extraction_update(raw: dict) -> dict:
+    """
+    Validate a raw extraction against the extraction models and return the state update
+    """
+    analysis = validate_extraction(raw)
+    return {
+        "document": analysis.document,
+        "entities": analysis.entities,
+        "individuals": analysis.individuals,
+        "details": analysis.details,
+        "cargo": analysis.cargo
+    }
+
+# Minimum characters in the PDF text layer to skip rasterization and the vision call
+PDF_TEXT_MIN_CHARS = int(getenv("PDF_TEXT_MIN_CHARS", "200"))
+
+def extract_pdf_text(file_path: str) -> str:
+    """
+    Extract the text layer of the first page of a PDF, empty string if the PDF is scanned.
+    Only the first page is used, the same page the vision path sends, so a long
+    multi-page PDF does not overflow the llm context.
+    """
+    try:
+        reader = PdfReader(file_path)
+        text = (reader.pages[0].extract_text() or "") if reader.pages else ""
+    except Exception as e:
+        logger.warning("No se pudo leer la capa de texto del PDF %s: %s", file_path, e)
+        return ""
+    text = text.strip()
+    return text if len(text) >= PDF_TEXT_MIN_CHARS else ""
+
+# Directory of the PNGs rasterized from scanned PDFs, removed after the vision call
+RASTER_CACHE_DIR = getenv("RASTER_CACHE_DIR", path.join(tempfile.gettempdir(), "entity-identifier-pages"))
+
+def rasterized_path(file_path: str) -> str:
+    """
+    Path of the PNG rasterized from a PDF, the same for every run on that file
+    """
+    digest = hashlib.sha256(path.abspath(file_path).encode("utf-8")).hexdigest()[:32]
+    return path.join(RASTER_CACHE_DIR, f"{digest}.png")
+
+def rasterize_pdf(file_path: str) -> str:
+    """
+    Rasterize the first page of a PDF to a PNG and return its path.
+    The path is derived from the PDF path, so retries of a failed job
+    overwrite the same file instead of leaving one PNG per attempt.
+    """
+    # Solo se envía la primera página, no rasterizar el resto
+    images = convert_from_path(file_path, first_page=1, last_page=1)
+    if not images:
+        raise Exception("No se pudo extraer ninguna imagen del PDF")
+    image_path = rasterized_path(file_path)
+    makedirs(RASTER_CACHE_DIR, exist_ok=True)
+    # Escribir aparte y reemplazar, un lector concurrente nunca ve un PNG a medias
+    with tempfile.NamedTemporaryFile(suffix=".png", dir=RASTER_CACHE_DIR, delete=False) as image_file:
+        images[0].save(image_file, format="PNG")
+    replace(image_file.name, image_path)
+    return image_path
+
 # define file encoder node
+@cpu_bound
+@profiled
 def encode_file_to_base64(state: OverallState):
     """
-    Convert a file (pdf or image) to base64
+    Prepare the image sent to the vision model (pdf or image).
+    Scanned PDFs are rasterized to a PNG in RASTER_CACHE_DIR, images are used as is; the
+    base64 encoding is streamed by analyze_document from the image file.
+    Digitally-born PDFs skip rasterization and return their text layer instead.
     """
     extension = path.splitext(state.file_path)[1].lower()
     if extension == ".pdf":
-        images = convert_from_path(state.file_path)
-        if not images:
-            raise Exception("No se pudo extraer ninguna imagen del PDF")
-        img_byte_arr = io.BytesIO()
-        images[0].save(img_byte_arr, format="PNG")
-        return {"file_base64": base64.b64encode(img_byte_arr.getvalue()).decode("utf-8")}
+        file_text = extract_pdf_text(state.file_path)
+        if file_text:
+            return {"file_text": file_text}
+        return {"file_image_path": rasterize_pdf(state.file_path)}
     else:
-        with open(state.file_path, "rb") as file:
-            return {"file_base64": base64.b64encode(file.read()).decode("utf-8")}
+        return {"file_image_path": state.file_path}
         
 #define document analyser node - API call
+@io_bound
+@profiled
 def analyze_document(state: OverallState):
     """
-    Analyse a document making an OPENROUTER API call - Qwen2.5VL model
+    Analyse a document making an OPENROUTER API call - Qwen2.5VL model.
+    Documents with a text layer are analysed by the text llm instead.
     """
-    # encode file to base64
-    file_base64 = state.file_base64
-    
-    response = requests.post(
-        url="https://openrouter.ai/api/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {getenv('OPENROUTER_API_KEY')}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps({
-            "model": "qwen/qwen2.5-vl-72b-instruct:free",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": OCR_PROMPT
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{file_base64}"
-                            }
-                        }
-                    ]
-                }
-            ]
-        })
-    )
+    if state.file_text:
+        return analyze_document_text(state)
+
+    image_path = state.file_image_path
+    rasterized = image_path != state.file_path
+    if rasterized and not path.exists(image_path):
+        # Reanudación tras borrar la imagen rasterizada: volver a rasterizar
+        image_path = rasterize_pdf(state.file_path)
+
+    try:
+        # request body streamed from the image file, base64 encoded in chunks
+        body = StreamingChatBody(
+            OCR_PROMPT,
+            image_path,
+            model="qwen/qwen2.5-vl-72b-instruct:free"
+        )
+
+        response = requests.post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {getenv('OPENROUTER_API_KEY')}",
+                "Content-Type": "application/json",
+            },
+            data=body
+        )
+    finally:
+        # Eliminar la imagen generada a partir del PDF tanto si la llamada fue bien como si falló
+        if rasterized:
+            with suppress(FileNotFoundError):
+                remove(image_path)
 
     result = response.json()
     parsed_result = process_json_response(result)
     
     # Extraer cada componente del resultado analizado
-    return {
-        "document": parsed_result["document"],
-        "entities": parsed_result["entities"],
-        "individuals": parsed_result["individuals"],
-        "details": parsed_result["details"],
-        "cargo": parsed_result["cargo"]
-    }
+    return extraction_update(parsed_result)
+
+def analyze_document_text(state: OverallState):
+    """
+    Analyse the text layer of a digitally-born PDF with the DeepSeek llm
+    """
+    response = llm.invoke([
+        {"role": "system", "content": TEXT_EXTRACTION_PROMPT},
+        {"role": "user", "content": state.file_text},
+    ])
+    parsed_result = process_json_response(response.content)
+
+    return extraction_update(parsed_result)
 
 # define quality assurance node
+@io_bound
+@profiled
 def review_quality(state: OverallState):
     """
     Analyse the quality of the document
@@ -111,8 +192,8 @@ def review_quality(state: OverallState):
     cargo = state.cargo
     feedback_on_extraction = state.feedback_on_extraction        
 
-    # llm structured output
-    llm_structured_output = llm.with_structured_output(state.extraction_schema)
+    # llm structured output, memoized per schema
+    llm_structured_output = get_structured_llm(llm, state.extraction_schema)
 
     # prompt
     query_instructions = QUALITY_ASSURANCE_PROMPT.format(
@@ -133,13 +214,7 @@ def review_quality(state: OverallState):
         },
     ])
 
-    return {
-        "document": response["document"],
-        "entities": response["entities"],
-        "individuals": response["individuals"],
-        "details": response["details"],
-        "cargo": response["cargo"]
-    }
+    return extraction_update(response)
 
 def human_feedback(state: OverallState) -> Command[Literal["review_quality", END]]:
     """
@@ -199,6 +274,7 @@ def router(state: OverallState):
     nodes = ['format_entities', 'format_individuals', 'format_company']
     return nodes
 
+@profiled
 def format_entities(state: OverallState):
     """
     Format entities - Nodo de prueba para procesamiento paralelo
@@ -210,6 +286,7 @@ def format_entities(state: OverallState):
     
     return {"entities": entities, "entities_processed": True}
 
+@profiled
 def format_individuals(state: OverallState):
     """
     Format individuals - Nodo de prueba para procesamiento paralelo
@@ -221,6 +298,7 @@ def format_individuals(state: OverallState):
     
     return {"individuals": individuals, "individuals_processed": True}
 
+@profiled
 def format_company(state: OverallState):
     """
     Format company - Nodo de prueba para procesamiento paralelo
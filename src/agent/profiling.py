@@ -0,0 +1,180 @@
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from os import getenv, path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Opt-in profiling of graph nodes, configured by environment or configure_profiling()
+_config = {
+    "enabled": getenv("NODE_PROFILING", "false").lower() in ("1", "true", "yes"),
+    "sample_rate": float(getenv("NODE_PROFILING_SAMPLE_RATE", "0.1")),
+    "output_dir": getenv("NODE_PROFILING_DIR", "profiles"),
+    # empty: every node decorated with @profiled
+    "nodes": {name.strip() for name in getenv("NODE_PROFILING_NODES", "").split(",") if name.strip()},
+    "top_allocations": int(getenv("NODE_PROFILING_TOP_ALLOCATIONS", "25")),
+}
+
+# cProfile and tracemalloc are process-wide, only one node is profiled at a time
+_profiling_lock = threading.Lock()
+
+
+def configure_profiling(
+    enabled: Optional[bool] = None,
+    sample_rate: Optional[float] = None,
+    output_dir: Optional[str] = None,
+    nodes: Optional[Iterable[str]] = None,
+    top_allocations: Optional[int] = None,
+):
+    """
+    Override the profiling configuration read from the environment.
+    Only this process is affected: process-pool workers that are already
+    running (NODE_EXECUTOR) keep the configuration they started with, use the
+    NODE_PROFILING_* variables or recreate the pools with configure_executors().
+    """
+    if enabled is not None:
+        _config["enabled"] = enabled
+    if sample_rate is not None:
+        _config["sample_rate"] = sample_rate
+    if output_dir is not None:
+        _config["output_dir"] = output_dir
+    if nodes is not None:
+        _config["nodes"] = set(nodes)
+    if top_allocations is not None:
+        _config["top_allocations"] = top_allocations
+
+
+def _should_profile(name: str) -> bool:
+    if not _config["enabled"]:
+        return False
+    if _config["nodes"] and name not in _config["nodes"]:
+        return False
+    return random.random() < _config["sample_rate"]
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 64) -> List[str]:
+    """
+    Convert cProfile stats to collapsed stacks ("a;b;c <microseconds>") for flamegraph tools.
+
+    cProfile only records caller/callee pairs, so the time of a function
+    called from several places is split between them in proportion to the
+    cumulative time of each call edge (approximation).
+    """
+    raw: Dict = stats.stats
+    callees: Dict = {func: [] for func in raw}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            if caller in callees:
+                callees[caller].append(func)
+
+    def label(func) -> str:
+        filename, lineno, name = func
+        return f"{name} ({path.basename(filename)}:{lineno})" if lineno else name
+
+    totals: Dict[str, float] = {}
+
+    def walk(func, stack: List[str], weight: float):
+        _, _, self_time, cumulative, _ = raw[func]
+        stack = stack + [label(func)]
+        # Paths under a microsecond are pruned to bound the number of stacks
+        if cumulative <= 0 or weight < 1e-6:
+            return
+        key = ";".join(stack)
+        totals[key] = totals.get(key, 0.0) + weight * self_time / cumulative
+        if len(stack) >= max_depth:
+            return
+        for callee in callees[func]:
+            if label(callee) in stack:
+                continue
+            edge_cumulative = raw[callee][4][func][3]
+            walk(callee, stack, weight * edge_cumulative / cumulative)
+
+    roots = [func for func, (_, _, _, _, callers) in raw.items() if not any(c in raw for c in callers)]
+    for root in roots:
+        walk(root, [], raw[root][3])
+
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in totals.items() if int(seconds * 1e6) > 0]
+
+
+def _write_reports(name: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int, elapsed: float):
+    node_dir = path.join(_config["output_dir"], name)
+    os.makedirs(node_dir, exist_ok=True)
+    # uuid suffix: several runs of the same node can be sampled within one second
+    prefix = path.join(node_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:12]}")
+
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(f"{prefix}.prof")
+    with open(f"{prefix}.collapsed", "w", encoding="utf-8") as file:
+        file.write("\n".join(collapsed_stacks(stats)))
+        file.write("\n")
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    top = snapshot.statistics("traceback")[:_config["top_allocations"]]
+    with open(f"{prefix}.alloc.txt", "w", encoding="utf-8") as file:
+        file.write(f"node: {name}\nelapsed: {elapsed:.3f} s\npeak traced memory: {peak / 1024:.1f} KiB\n")
+        # tracemalloc no separa por hilo
+        file.write(
+            "note: allocations are traced process-wide, they include other threads (parallel format_* "
+            "nodes, IO pool) that ran while this node was sampled\n\n"
+        )
+        for index, stat in enumerate(top, 1):
+            file.write(f"#{index}: {stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            for line in stat.traceback.format():
+                file.write(f"    {line}\n")
+            file.write("\n")
+
+
+def profiled(fn):
+    """
+    Profile a node with cProfile and tracemalloc on a sample of runs.
+
+    Reports are written to <output_dir>/<node>/: a pstats dump (.prof),
+    collapsed stacks (.collapsed) and the top allocations (.alloc.txt).
+    The wrapper keeps the node name so it can still be pickled for the
+    process pool. cProfile only sees the calling thread, but tracemalloc is
+    process-wide: the allocation report also counts other threads running
+    at the same time, the lock only keeps two profiles from overlapping.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _should_profile(name) or not _profiling_lock.acquire(blocking=False):
+            return fn(*args, **kwargs)
+
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(25)
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - start
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+                try:
+                    _write_reports(name, profiler, snapshot, peak, elapsed)
+                except Exception:
+                    logger.exception("No se pudo escribir el perfil del nodo %s", name)
+        finally:
+            _profiling_lock.release()
+
+    return wrapper
@@ -1,9 +1,16 @@
-OCR_PROMPT = """"Analyze this Bill of Lading image and return the information in the following JSON format. 
+import json
+from string import Template
+
+from src.agent.state import extraction_skeleton
+
+# Shared extraction prompt, $medium is the kind of input (image or text) and
+# $skeleton the JSON structure built from the extraction models
+EXTRACTION_PROMPT_TEMPLATE = Template(""""Analyze this Bill of Lading $medium and return the information in the following JSON format. 
 Make sure to:
 
 1. Keep exactly the same structure
 2. Fill in all possible fields
-3. If a field is not present in the image, leave it as an empty string (""), do not invent information
+3. If a field is not present in the $medium, leave it as an empty string (""), do not invent information
 4. Use DD/MM/YYYYYY date format when possible
 5. Include units in numeric fields (example: "gross_weight": "1650 Kg")
 6. Simplify the item_name
@@ -13,54 +20,14 @@ Make sure to:
  - Issuing companies
  - Any other company mentioned
  8. For each entity, specify its exact role in the document, make sure entities and individuals are correctly categorized.
-{
-    "document": {
-        "type": "Bill of Lading",
-        "number": "",
-        "date_of_issue": "",
-        "date_of_shipment": ""
-    },
-    "entities": [
-        {
-            "name": "",
-            "role": "",
-            "address": "",
-            "city": "",
-            "country": "",
-            "postal_code": "",
-            "phone": "",
-            "email": ""
-        }
-    ],
-    "individuals": [
-        {
-            "name": "",
-            "company": "",
-            "role": "",
-            "country": "",
-            "email": ""
-        }
-    ],
-    "details": {
-        "place_of_receipt": "",
-        "port_of_loading": "",
-        "port_of_discharge": "",
-        "vessel_name": "",
-        "place_of_delivery": "",
-        "container": "",
-        "gross_weight": "",
-        "measurement": "",
-        "freight": ""
-    },
-    "cargo": {
-        "item_name": "",
-        "description": "",
-        "quantity": "",
-        "packing_list": "",
-        "incoterm": "",
-        "additional_notes": ""
-    }
-}"""
+$skeleton""")
+
+EXTRACTION_SKELETON = json.dumps(extraction_skeleton(), indent=4)
+
+OCR_PROMPT = EXTRACTION_PROMPT_TEMPLATE.substitute(medium="image", skeleton=EXTRACTION_SKELETON)
+
+# Same extraction contract for digitally-born PDFs, the text layer is sent as the user message
+TEXT_EXTRACTION_PROMPT = EXTRACTION_PROMPT_TEMPLATE.substitute(medium="text", skeleton=EXTRACTION_SKELETON)
 
 
 QUALITY_ASSURANCE_PROMPT = """
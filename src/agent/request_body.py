@@ -0,0 +1,91 @@
+import binascii
+import json
+import mimetypes
+import mmap
+from os import path
+from typing import Iterator
+
+# Multiple of 3 so every chunk encodes to base64 without intermediate padding
+CHUNK_SIZE = 3 * 64 * 1024
+
+# Placeholder replaced by the streamed base64 payload
+_PLACEHOLDER = "__FILE_BASE64__"
+
+
+def guess_image_mime_type(file_path: str) -> str:
+    """
+    Guess the mime type of an image, jpeg if unknown
+    """
+    mime_type, _ = mimetypes.guess_type(file_path)
+    return mime_type if mime_type and mime_type.startswith("image/") else "image/jpeg"
+
+
+def _encoded_length(size: int) -> int:
+    return 4 * ((size + 2) // 3)
+
+
+class StreamingChatBody:
+    """
+    Chat completion request body that streams the image as base64.
+
+    The body is yielded as prefix, base64 chunks encoded straight from a
+    memory-mapped file, then suffix. The file bytes, the full base64 string
+    and the serialized JSON are never held in memory at once. `__len__` lets
+    requests send a Content-Length header instead of chunked encoding.
+
+    Usage:
+        body = StreamingChatBody(OCR_PROMPT, "bol/billoflading.jpg", model="qwen/qwen2.5-vl-72b-instruct:free")
+        requests.post(url, headers=headers, data=body)
+    """
+
+    def __init__(self, prompt: str, image_path: str, model: str, mime_type: str = None, chunk_size: int = CHUNK_SIZE):
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+
+        self.image_path = image_path
+        self.chunk_size = chunk_size
+        mime_type = mime_type or guess_image_mime_type(image_path)
+
+        body = json.dumps({
+            "model": model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type};base64,{_PLACEHOLDER}"
+                            }
+                        }
+                    ]
+                }
+            ]
+        })
+        # The image url is serialized after the prompt, split on the last
+        # occurrence in case the prompt itself contains the placeholder
+        prefix, _, suffix = body.rpartition(_PLACEHOLDER)
+        self.prefix = prefix.encode("utf-8")
+        self.suffix = suffix.encode("utf-8")
+
+        self.file_size = path.getsize(image_path)
+
+    def __len__(self) -> int:
+        return len(self.prefix) + _encoded_length(self.file_size) + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        if self.file_size:
+            with open(self.image_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    # Slices of the memoryview are not copied before encoding
+                    for offset in range(0, self.file_size, self.chunk_size):
+                        yield binascii.b2a_base64(view[offset:offset + self.chunk_size], newline=False)
+                finally:
+                    view.release()
+        yield self.suffix
@@ -0,0 +1,289 @@
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower value is served first
+PRIORITIES = {
+    "urgent": 0,     # ej: presentaciones de cartas de crédito
+    "standard": 1,
+    "bulk": 2,       # ej: reprocesamiento de archivo
+}
+
+# Provider requests per document: vision call + quality review
+DEFAULT_JOB_COST = 2
+
+
+class AdmissionError(Exception):
+    """Job rejected by the scheduler admission control"""
+
+
+@dataclass
+class Job:
+    """Document job submitted to the scheduler"""
+    file_path: str
+    tenant: str = "default"
+    priority: str = "standard"
+    deadline: Optional[float] = None  # epoch seconds
+    cost: int = DEFAULT_JOB_COST
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    submitted_at: float = field(default_factory=time.time)
+
+
+class TokenBucket:
+    """
+    Provider rate budget, same parameters as the InMemoryRateLimiter of the llm
+    """
+
+    def __init__(self, requests_per_second: float, max_bucket_size: float):
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max_bucket_size
+        self._tokens = max_bucket_size
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_bucket_size, self._tokens + (now - self._last) * self.requests_per_second)
+        self._last = now
+
+    def try_acquire(self, cost: float) -> bool:
+        """
+        Take `cost` tokens if available
+        """
+        self._refill()
+        if self._tokens >= cost:
+            self._tokens -= cost
+            return True
+        return False
+
+    def time_until(self, cost: float) -> float:
+        """
+        Seconds until `cost` tokens are available
+        """
+        self._refill()
+        return max(0.0, (cost - self._tokens) / self.requests_per_second)
+
+
+class JobScheduler:
+    """
+    Job scheduler in front of the graph.
+
+    Jobs are served by priority class, then by weighted fair sharing across
+    tenants (lowest virtual time first) and by earliest deadline within a
+    tenant. Jobs whose deadline is within `deadline_slack` seconds jump ahead
+    of every class. Dispatch is paced by the provider rate budget, and jobs
+    are rejected on submit when the queue is full, when their cost can never
+    fit in the budget, or when the budget cannot serve them before their
+    deadline.
+
+    Usage:
+        scheduler = JobScheduler(tenant_weights={"trade_finance": 4, "archive": 1})
+        scheduler.submit(Job("bol/billoflading.pdf", tenant="trade_finance", priority="urgent", deadline=time.time() + 300))
+        scheduler.run(invoke_graph, workers=4)
+    """
+
+    def __init__(
+        self,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        requests_per_second: float = 4,
+        max_bucket_size: float = 10,
+        max_queue_depth: int = 10000,
+        deadline_slack: float = 60,
+        wait_samples: int = 1000,
+    ):
+        self.tenant_weights = tenant_weights or {}
+        self.max_queue_depth = max_queue_depth
+        self.deadline_slack = deadline_slack
+        self.budget = TokenBucket(requests_per_second, max_bucket_size)
+
+        self._lock = threading.Condition()
+        self._closed = False
+        self._sequence = itertools.count()
+        # priority -> tenant -> heap of (deadline, sequence, job)
+        self._queues: Dict[int, Dict[str, List]] = defaultdict(dict)
+        self._queued_cost: Dict[int, int] = defaultdict(int)
+        self._virtual_time: Dict[str, float] = defaultdict(float)
+
+        # metrics
+        self._depth: Dict[str, int] = defaultdict(int)
+        self._depth_by_tenant: Dict[str, int] = defaultdict(int)
+        self._wait_times: Dict[str, deque] = defaultdict(lambda: deque(maxlen=wait_samples))
+        self._dispatched: Dict[str, int] = defaultdict(int)
+        self._rejected: Dict[str, int] = defaultdict(int)
+        self._failed: Dict[str, int] = defaultdict(int)
+        self._deadline_missed = 0
+
+    def submit(self, job: Job) -> Job:
+        """
+        Queue a job, raise AdmissionError if it cannot be admitted
+        """
+        if job.priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {job.priority}, expected one of {list(PRIORITIES)}")
+        level = PRIORITIES[job.priority]
+
+        with self._lock:
+            if self._closed:
+                raise AdmissionError("Scheduler is closed")
+            if job.cost > self.budget.max_bucket_size:
+                # Nunca habría tokens suficientes y bloquearía al resto de trabajos
+                self._rejected["cost_exceeds_budget"] += 1
+                raise AdmissionError(f"Job cost {job.cost} exceeds the rate budget bucket size {self.budget.max_bucket_size}")
+            if sum(self._depth.values()) >= self.max_queue_depth:
+                self._rejected["queue_full"] += 1
+                raise AdmissionError(f"Queue is full ({self.max_queue_depth} jobs)")
+            if job.deadline is not None:
+                # Jobs of the same or higher priority are served first
+                cost_ahead = sum(cost for lvl, cost in self._queued_cost.items() if lvl <= level) + job.cost
+                estimated_start = time.time() + cost_ahead / self.budget.requests_per_second
+                if estimated_start > job.deadline:
+                    self._rejected["deadline_unreachable"] += 1
+                    raise AdmissionError(f"Job {job.job_id} cannot start before its deadline with the current rate budget")
+
+            tenant_queues = self._queues[level]
+            if job.tenant not in tenant_queues or not tenant_queues[job.tenant]:
+                # A tenant returning from idle does not keep credit from its idle time
+                active = [self._virtual_time[t] for queues in self._queues.values() for t, heap in queues.items() if heap]
+                if active:
+                    self._virtual_time[job.tenant] = max(self._virtual_time[job.tenant], min(active))
+            deadline = job.deadline if job.deadline is not None else math.inf
+            heapq.heappush(tenant_queues.setdefault(job.tenant, []), (deadline, next(self._sequence), job))
+
+            self._queued_cost[level] += job.cost
+            self._depth[job.priority] += 1
+            self._depth_by_tenant[job.tenant] += 1
+            self._lock.notify()
+        return job
+
+    def _select(self):
+        """
+        Return (level, tenant) of the next job to dispatch, None if empty
+        """
+        # Deadline about to expire: earliest deadline across all classes
+        horizon = time.time() + self.deadline_slack
+        urgent = [
+            (heap[0][0], heap[0][1], level, tenant)
+            for level, queues in self._queues.items()
+            for tenant, heap in queues.items()
+            if heap and heap[0][0] <= horizon
+        ]
+        if urgent:
+            _, _, level, tenant = min(urgent)
+            return level, tenant
+
+        for level in sorted(self._queues):
+            tenants = [tenant for tenant, heap in self._queues[level].items() if heap]
+            if tenants:
+                return level, min(tenants, key=lambda t: (self._virtual_time[t], t))
+        return None
+
+    def next_job(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """
+        Block until a job can be dispatched within the rate budget, None on timeout or close
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                selected = self._select()
+                if selected is None:
+                    if self._closed:
+                        return None
+                    wait = None
+                else:
+                    level, tenant = selected
+                    job = self._queues[level][tenant][0][2]
+                    if self.budget.try_acquire(job.cost):
+                        heapq.heappop(self._queues[level][tenant])
+                        self._dispatched_job(level, job)
+                        return job
+                    wait = self.budget.time_until(job.cost)
+
+                if end is not None:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._lock.wait(wait)
+
+    def _dispatched_job(self, level: int, job: Job):
+        now = time.time()
+        self._queued_cost[level] -= job.cost
+        self._depth[job.priority] -= 1
+        self._depth_by_tenant[job.tenant] -= 1
+        self._virtual_time[job.tenant] += job.cost / self.tenant_weights.get(job.tenant, 1)
+        self._wait_times[job.priority].append(now - job.submitted_at)
+        self._dispatched[job.priority] += 1
+        if job.deadline is not None and now > job.deadline:
+            self._deadline_missed += 1
+
+    def close(self):
+        """
+        Stop accepting jobs, workers exit once the queue is drained
+        """
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+
+    def run(self, handler: Callable[[Job], object], workers: int = 4):
+        """
+        Dispatch jobs to `handler` from `workers` threads until close() and the queue is drained
+        """
+        def worker():
+            while True:
+                job = self.next_job()
+                if job is None:
+                    return
+                try:
+                    handler(job)
+                except Exception:
+                    logger.exception("Error al procesar el trabajo %s (%s)", job.job_id, job.file_path)
+                    with self._lock:
+                        self._failed[job.priority] += 1
+
+        threads = [threading.Thread(target=worker, name=f"scheduler-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def metrics(self) -> dict:
+        """
+        Queue depth, wait time, admission and handler failure metrics
+        """
+        with self._lock:
+            wait_time = {}
+            for priority, samples in self._wait_times.items():
+                ordered = sorted(samples)
+                if not ordered:
+                    continue
+                wait_time[priority] = {
+                    "count": self._dispatched[priority],
+                    "mean": sum(ordered) / len(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                }
+            return {
+                "queue_depth": {p: n for p, n in self._depth.items() if n},
+                "queue_depth_by_tenant": {t: n for t, n in self._depth_by_tenant.items() if n},
+                "wait_time": wait_time,
+                "rejected": dict(self._rejected),
+                "failed": dict(self._failed),
+                "deadline_missed": self._deadline_missed,
+            }
+
+
+def invoke_graph(job: Job):
+    """
+    Default handler, run the non-interactive batch graph on the job document
+    """
+    from src.agent.graph import batch_graph
+
+    return batch_graph.invoke({"file_path": job.file_path})
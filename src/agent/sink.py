@@ -0,0 +1,165 @@
+import json
+import time
+from os import getenv, makedirs, path
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from .state import Cargo, Details, DocumentInfo, Entity, Individual, OverallStateOutput
+
+# Scalar sections are flattened to "<section>_<field>" columns, list sections
+# are kept as lists of records (one row per processed document)
+SCALAR_SECTIONS = {
+    "document": DocumentInfo,
+    "details": Details,
+    "cargo": Cargo,
+}
+LIST_SECTIONS = {
+    "entities": Entity,
+    "individuals": Individual,
+}
+
+
+def flatten_result(result: Union[OverallStateOutput, Dict[str, Any]], file_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Flatten a graph result into a single row.
+
+    Args:
+        result: OverallStateOutput or the dict returned by graph.invoke
+        file_path: Path of the processed document (optional)
+
+    Returns:
+        dict: Row with "<section>_<field>" scalar columns and entities/individuals lists
+    """
+    if isinstance(result, dict) and "__interrupt__" in result:
+        raise ValueError("Result was interrupted for human review, run the batch with batch_graph from src.agent.graph")
+    if not isinstance(result, OverallStateOutput):
+        result = OverallStateOutput.model_validate(result)
+
+    row = {"file_path": file_path, "processed_at": time.time()}
+    for section, model in SCALAR_SECTIONS.items():
+        value = getattr(result, section)
+        for field_name in model.model_fields:
+            row[f"{section}_{field_name}"] = getattr(value, field_name) if value is not None else None
+    for section in LIST_SECTIONS:
+        row[section] = [item.model_dump() for item in getattr(result, section) or []]
+    return row
+
+
+def _arrow_schema():
+    """
+    Build the Arrow schema of a flattened row from the state models.
+    """
+    import pyarrow as pa
+
+    fields = [
+        pa.field("file_path", pa.string()),
+        pa.field("processed_at", pa.float64()),
+    ]
+    for section, model in SCALAR_SECTIONS.items():
+        fields.extend(pa.field(f"{section}_{name}", pa.string()) for name in model.model_fields)
+    for section, model in LIST_SECTIONS.items():
+        item_type = pa.struct([pa.field(name, pa.string()) for name in model.model_fields])
+        fields.append(pa.field(section, pa.list_(item_type)))
+    return pa.schema(fields)
+
+
+class ResultSink:
+    """
+    Incremental writer of graph results to NDJSON and/or Parquet.
+
+    Rows are buffered in memory and flushed every `flush_every` rows or
+    `flush_interval` seconds, so memory stays bounded for large batches.
+    There is no background timer: the interval is only checked on `write()`,
+    so when results trickle in the last rows stay buffered until the next
+    write or `close()`. Call `flush()` to force it.
+    NDJSON is appended to a single file; Parquet is written as one part file
+    per flush inside a directory, which readers can load as a dataset. Each
+    flush triggered by the interval writes its own part file, so a slow
+    inflow produces many small parts; raise `flush_interval` or compact the
+    dataset afterwards.
+    Both outputs append across runs.
+
+    Usage:
+        with ResultSink(ndjson_path="out/results.ndjson", parquet_dir="out/results") as sink:
+            for file_path in files:
+                sink.write(batch_graph.invoke({"file_path": file_path}), file_path=file_path)
+    """
+
+    def __init__(
+        self,
+        ndjson_path: Optional[str] = None,
+        parquet_dir: Optional[str] = None,
+        flush_every: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        if ndjson_path is None and parquet_dir is None:
+            raise ValueError("At least one of ndjson_path or parquet_dir must be set")
+
+        self.ndjson_path = ndjson_path
+        self.parquet_dir = parquet_dir
+        self.flush_every = flush_every if flush_every is not None else int(getenv("RESULT_SINK_FLUSH_EVERY", "500"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(getenv("RESULT_SINK_FLUSH_INTERVAL", "30"))
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._parts_written = 0
+        self._schema = None
+
+        if ndjson_path and path.dirname(ndjson_path):
+            makedirs(path.dirname(ndjson_path), exist_ok=True)
+        if parquet_dir:
+            # pyarrow is only needed when writing parquet
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError("pyarrow is required to write parquet results: pip install pyarrow") from e
+            makedirs(parquet_dir, exist_ok=True)
+            self._schema = _arrow_schema()
+
+    def write(self, result: Union[OverallStateOutput, Dict[str, Any], BaseModel], file_path: Optional[str] = None):
+        """
+        Buffer a result and flush if the buffer is full or stale (the interval is only checked here)
+        """
+        self._buffer.append(flatten_result(result, file_path=file_path))
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows to disk and clear the buffer
+        """
+        if self._buffer:
+            if self.ndjson_path:
+                self._write_ndjson(self._buffer)
+            if self.parquet_dir:
+                self._write_parquet(self._buffer)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flush pending rows
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_ndjson(self, rows: List[Dict[str, Any]]):
+        with open(self.ndjson_path, "a", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False))
+                file.write("\n")
+
+    def _write_parquet(self, rows: List[Dict[str, Any]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(rows, schema=self._schema)
+        # Unique part names so successive runs append to the same dataset
+        part_name = f"part-{time.time_ns()}-{self._parts_written:05d}.parquet"
+        pq.write_table(table, path.join(self.parquet_dir, part_name))
+        self._parts_written += 1
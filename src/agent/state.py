@@ -4,91 +4,9 @@ from dataclasses import dataclass, field
 from typing import Any
 
 
-DEFAULT_EXTRACTION_SCHEMA = {
-    "title": "DocumentAnalysis",
-    "description": "Analyze and extract information from a trade finance document",
-    "type": "object",
-    "properties": {
-        "document": {
-            "type": "object",
-            "description": "Basic document information",
-            "properties": {
-                "type": {"type": "string", "description": "Type of document (e.g., Bill of Lading)"},
-                "number": {"type": "string", "description": "Document identification number"},
-                "date_of_issue": {"type": "string", "description": "Date when the document was issued"},
-                "date_of_shipment": {"type": "string", "description": "Date of cargo shipment"}
-            },
-            "required": ["type", "number", "date_of_issue", "date_of_shipment"]
-        },
-        "entities": {
-            "type": "array",
-            "description": "List of commercial entities involved in the transaction",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Entity name"},
-                    "role": {"type": "string", "description": "Role in the transaction"},
-                    "address": {"type": "string", "description": "Physical address"},
-                    "city": {"type": "string", "description": "City"},
-                    "country": {"type": "string", "description": "Country"},
-                    "postal_code": {"type": "string", "description": "Postal code"},
-                    "phone": {"type": "string", "description": "Phone number"},
-                    "email": {"type": "string", "description": "Email address"}
-                },
-                "required": ["name", "role"]
-            }
-        },
-        "individuals": {
-            "type": "array",
-            "description": "List of individuals involved in the transaction",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Individual's name"},
-                    "company": {"type": "string", "description": "Associated company"},
-                    "role": {"type": "string", "description": "Role in the transaction"},
-                    "country": {"type": "string", "description": "Country"},
-                    "email": {"type": "string", "description": "Email address"}
-                },
-                "required": ["company", "role"]
-            }
-        },
-        "details": {
-            "type": "object",
-            "description": "Shipment details",
-            "properties": {
-                "place_of_receipt": {"type": "string", "description": "Initial receipt location"},
-                "port_of_loading": {"type": "string", "description": "Loading port"},
-                "port_of_discharge": {"type": "string", "description": "Discharge port"},
-                "vessel_name": {"type": "string", "description": "Vessel name"},
-                "place_of_delivery": {"type": "string", "description": "Final delivery location"},
-                "container": {"type": "string", "description": "Container number"},
-                "gross_weight": {"type": "string", "description": "Gross weight"},
-                "measurement": {"type": "string", "description": "Cargo measurements"},
-                "freight": {"type": "string", "description": "Freight cost"}
-            },
-            "required": ["port_of_loading", "port_of_discharge", "vessel_name"]
-        },
-        "cargo": {
-            "type": "object",
-            "description": "Cargo information",
-            "properties": {
-                "item_name": {"type": "string", "description": "Name of the product"},
-                "description": {"type": "string", "description": "Detailed cargo description"},
-                "quantity": {"type": "string", "description": "Quantity of units"},
-                "packing_list": {"type": "string", "description": "Packaging details"},
-                "incoterm": {"type": "string", "description": "International trade term"},
-                "additional_notes": {"type": "string", "description": "Additional information"}
-            },
-            "required": ["item_name", "description", "quantity"]
-        }
-    },
-    "required": ["document", "entities", "details", "cargo"]
-}
-
 class DocumentInfo(BaseModel):
     """Document information"""
-    type: Optional[str] = Field(description="document type (ej: Bill of Lading, Invoice, etc)")
+    type: Optional[str] = Field(description="document type (ej: Bill of Lading, Invoice, etc)", examples=["Bill of Lading"])
     number: Optional[str] = Field(description="unique document identification number")
     date_of_issue: Optional[str] = Field(description="date of issue of the document")
     date_of_shipment: Optional[str] = Field(description="date of shipment of the cargo")
@@ -97,41 +15,98 @@ class Entity(BaseModel):
     """Entity information"""
     name: Optional[str] = Field(description="full name of the entity")
     role: Optional[str] = Field(description="role in the transaction (ej: Shipper, Consignee, etc)")
-    address: Optional[str] = Field(description="full physical address")
-    city: Optional[str] = Field(description="city of location")
-    country: Optional[str] = Field(description="country of location")
-    postal_code: Optional[str] = Field(description="postal code")
-    phone: Optional[str] = Field(description="phone number")
-    email: Optional[str] = Field(description="email")
+    address: Optional[str] = Field(None, description="full physical address")
+    city: Optional[str] = Field(None, description="city of location")
+    country: Optional[str] = Field(None, description="country of location")
+    postal_code: Optional[str] = Field(None, description="postal code")
+    phone: Optional[str] = Field(None, description="phone number")
+    email: Optional[str] = Field(None, description="email")
 
 class Individual(BaseModel):
     """Individual information"""
-    name: Optional[str] = Field(description="full name of the individual")
+    name: Optional[str] = Field(None, description="full name of the individual")
     company: Optional[str] = Field(description="company to which the individual belongs")
     role: Optional[str] = Field(description="role of the individual in the transaction")
-    country: Optional[str] = Field(description="country of origin/location")
-    email: Optional[str] = Field(description="email")
+    country: Optional[str] = Field(None, description="country of origin/location")
+    email: Optional[str] = Field(None, description="email")
 
 class Details(BaseModel):
     """Shipment details"""
-    place_of_receipt: Optional[str] = Field(description="place where the cargo is initially received")
+    place_of_receipt: Optional[str] = Field(None, description="place where the cargo is initially received")
     port_of_loading: Optional[str] = Field(description="loading port")
     port_of_discharge: Optional[str] = Field(description="discharge port")
     vessel_name: Optional[str] = Field(description="vessel name")
-    place_of_delivery: Optional[str] = Field(description="final delivery place")
-    container: Optional[str] = Field(description="container number")
-    gross_weight: Optional[str] = Field(description="gross weight of the cargo")
-    measurement: Optional[str] = Field(description="measurements/volume of the cargo")
-    freight: Optional[str] = Field(description="freight cost")
+    place_of_delivery: Optional[str] = Field(None, description="final delivery place")
+    container: Optional[str] = Field(None, description="container number")
+    gross_weight: Optional[str] = Field(None, description="gross weight of the cargo")
+    measurement: Optional[str] = Field(None, description="measurements/volume of the cargo")
+    freight: Optional[str] = Field(None, description="freight cost")
 
 class Cargo(BaseModel):
     """Cargo information"""
     item_name: Optional[str] = Field(description="name of the product or cargo")
     description: Optional[str] = Field(description="detailed description of the cargo")
     quantity: Optional[str] = Field(description="quantity of units")
-    packing_list: Optional[str] = Field(description="details of the packaging and distribution")
-    incoterm: Optional[str] = Field(description="international trade term applied")
-    additional_notes: Optional[str] = Field(description="additional notes about the cargo")
+    packing_list: Optional[str] = Field(None, description="details of the packaging and distribution")
+    incoterm: Optional[str] = Field(None, description="international trade term applied")
+    additional_notes: Optional[str] = Field(None, description="additional notes about the cargo")
+
+class DocumentAnalysis(BaseModel):
+    """Analyze and extract information from a trade finance document"""
+    document: DocumentInfo = Field(description="information extracted from the document")
+    entities: List[Entity] = Field(description="commercial entities identified")
+    individuals: List[Individual] = Field(default_factory=list, description="individuals identified")
+    details: Details = Field(description="extracted shipment details")
+    cargo: Cargo = Field(description="identified cargo information")
+
+def _simplify_schema(node: Any, defs: dict) -> Any:
+    """
+    Inline $defs/$ref and reduce Optional (anyOf with null) to the plain type,
+    so the schema keeps the flat shape sent to DeepSeek function calling
+    """
+    if isinstance(node, list):
+        return [_simplify_schema(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        target = defs[node["$ref"].split("/")[-1]]
+        rest = {key: value for key, value in node.items() if key != "$ref"}
+        return {**_simplify_schema(target, defs), **_simplify_schema(rest, defs)}
+    if "anyOf" in node:
+        non_null = [option for option in node["anyOf"] if option.get("type") != "null"]
+        if len(non_null) == 1:
+            rest = {key: value for key, value in node.items() if key != "anyOf"}
+            return {**_simplify_schema(non_null[0], defs), **_simplify_schema(rest, defs)}
+    return {
+        key: _simplify_schema(value, defs)
+        for key, value in node.items()
+        if key != "$defs" and not (key == "default" and value is None)
+    }
+
+def extraction_schema(model: type = None) -> dict:
+    """
+    JSON schema of an extraction model, self-contained (no $ref)
+    """
+    schema = (model or DocumentAnalysis).model_json_schema()
+    return _simplify_schema(schema, schema.get("$defs", {}))
+
+def extraction_skeleton(model: type = None) -> dict:
+    """
+    Empty JSON skeleton of an extraction model, used in the extraction prompts
+    """
+    skeleton = {}
+    for name, field_info in (model or DocumentAnalysis).model_fields.items():
+        annotation = field_info.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            skeleton[name] = extraction_skeleton(annotation)
+        elif getattr(annotation, "__origin__", None) is list:
+            skeleton[name] = [extraction_skeleton(annotation.__args__[0])]
+        else:
+            skeleton[name] = field_info.examples[0] if field_info.examples else ""
+    return skeleton
+
+# Extraction schema derived from the models above, single source of the extraction contract
+DEFAULT_EXTRACTION_SCHEMA = extraction_schema(DocumentAnalysis)
 
 class OverallStateInput(BaseModel):
     """Input state"""
@@ -140,7 +115,8 @@ class OverallStateInput(BaseModel):
 class OverallState(BaseModel):
     """Overall state during processing"""
     file_path: str = Field(description="path to the file being processed")
-    file_base64: Optional[str] = Field(None, description="content of the file encoded in base64")
+    file_image_path: Optional[str] = Field(None, description="path to the image sent to the vision model")
+    file_text: Optional[str] = Field(None, description="text layer of the file, set for digitally-born PDFs")
     document: Optional[DocumentInfo] = Field(None, description="document information")
     entities: Optional[List[Entity]] = Field(None, description="list of commercial entities involved")
     individuals: Optional[List[Individual]] = Field(None, description="list of individuals involved")
@@ -149,13 +125,8 @@ class OverallState(BaseModel):
     extraction_schema: dict = Field(default=DEFAULT_EXTRACTION_SCHEMA, description="schema for extraction")
     feedback_on_extraction: Optional[Union[bool, str]] = Field(None, description="feedback on the extraction")
 
-class OverallStateOutput(BaseModel):
+class OverallStateOutput(DocumentAnalysis):
     """Output state"""
-    document: DocumentInfo = Field(description="information extracted from the document")
-    entities: List[Entity] = Field(description="commercial entities identified")
-    individuals: List[Individual] = Field(description="individuals identified")
-    details: Details = Field(description="extracted shipment details")
-    cargo: Cargo = Field(description="identified cargo information")
     
 class SendState(TypedDict):
     entities: List[Entity]
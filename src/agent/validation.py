@@ -0,0 +1,83 @@
+import json
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from .state import DocumentAnalysis
+
+# Attribute of the llm holding its structured-output runnables, one per schema
+_STRUCTURED_LLMS_ATTR = "_structured_llms"
+
+
+def schema_key(schema: Dict[str, Any]) -> str:
+    """
+    Stable cache key for a JSON schema
+    """
+    return json.dumps(schema, sort_keys=True)
+
+
+def get_structured_llm(llm, schema: Dict[str, Any]):
+    """
+    Return the memoized `llm.with_structured_output(schema)` runnable.
+
+    The runnables are stored on the llm itself: they reference the llm, so a
+    module-level cache would keep every llm alive, and chat models are
+    unhashable so they cannot be weak keys. The cache is tagged with a weak
+    reference to its owner, so a copy of the llm (model_copy shares the
+    instance dict) builds its own runnables instead of reusing the original's.
+    """
+    owner, runnables = llm.__dict__.get(_STRUCTURED_LLMS_ATTR, (None, None))
+    if owner is None or owner() is not llm:
+        runnables = {}
+        # object.__setattr__: chat models are pydantic models without this field
+        object.__setattr__(llm, _STRUCTURED_LLMS_ATTR, (weakref.ref(llm), runnables))
+    key = schema_key(schema)
+    if key not in runnables:
+        runnables[key] = llm.with_structured_output(schema)
+    return runnables[key]
+
+
+@lru_cache(maxsize=None)
+def get_validator(model: Type[BaseModel] = DocumentAnalysis) -> TypeAdapter:
+    """
+    Return the memoized TypeAdapter for a single extraction
+    """
+    return TypeAdapter(model)
+
+
+@lru_cache(maxsize=None)
+def get_bulk_validator(model: Type[BaseModel] = DocumentAnalysis) -> TypeAdapter:
+    """
+    Return the memoized TypeAdapter for a list of extractions
+    """
+    return TypeAdapter(List[model])
+
+
+def validate_extraction(raw: Dict[str, Any], model: Type[BaseModel] = DocumentAnalysis) -> BaseModel:
+    """
+    Validate a raw extraction dict against the extraction models
+    """
+    return get_validator(model).validate_python(raw)
+
+
+def validate_extractions(raws: List[Dict[str, Any]], model: Type[BaseModel] = DocumentAnalysis) -> List[BaseModel]:
+    """
+    Validate a list of raw extraction dicts in a single pydantic-core call.
+
+    Args:
+        raws: Raw extraction dicts (e.g. parsed llm responses)
+        model: Extraction model, DocumentAnalysis by default
+
+    Returns:
+        list: Validated models, in the same order as `raws`
+    """
+    return get_bulk_validator(model).validate_python(raws)
+
+
+def validate_extractions_json(data: bytes, model: Type[BaseModel] = DocumentAnalysis) -> List[BaseModel]:
+    """
+    Validate a JSON array of extractions without building intermediate dicts
+    """
+    return get_bulk_validator(model).validate_json(data)
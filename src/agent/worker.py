@@ -0,0 +1,189 @@
+"""
+Worker daemon and CLI for the durable job queue.
+
+Usage:
+    python -m src.agent.worker submit bol/billoflading.pdf bol/billoflading_2.jpg --tenant archive --priority bulk
+    python -m src.agent.worker status [JOB_ID]
+    python -m src.agent.worker work --workers 4
+    python -m src.agent.worker requeue-dead
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from .job_queue import DEFAULT_DB_PATH, JobQueue
+from .scheduler import PRIORITIES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "300"))
+DEFAULT_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+
+
+def _heartbeat(queue_db: str, job_id: str, worker_id: str, lease_seconds: float, stop: threading.Event):
+    """
+    Extend the job lease while it is being processed
+    """
+    queue = JobQueue(queue_db)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.extend_lease(job_id, worker_id, lease_seconds):
+                logger.warning("[%s] Lease perdido para el trabajo %s", worker_id, job_id)
+                return
+    finally:
+        queue.close()
+
+
+def worker_loop(db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """
+    Process jobs until SIGTERM/SIGINT. The graph and its clients are loaded once per process.
+    Jobs run on batch_graph, without the interactive human review.
+    """
+    from src.agent.graph import batch_graph
+    from src.agent.state import OverallStateOutput
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    stopping = threading.Event()
+
+    def request_stop(signum, frame):
+        # Terminar el trabajo en curso antes de salir
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    queue = JobQueue(db_path)
+    logger.info("[%s] Worker listo", worker_id)
+    try:
+        while not stopping.is_set():
+            job = queue.claim(worker_id, lease_seconds)
+            if job is None:
+                stopping.wait(poll_interval)
+                continue
+
+            heartbeat_stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=_heartbeat,
+                args=(db_path, job.id, worker_id, lease_seconds, heartbeat_stop),
+                daemon=True,
+            )
+            heartbeat.start()
+            try:
+                result = batch_graph.invoke({"file_path": job.file_path})
+                output = OverallStateOutput.model_validate(result).model_dump()
+                if not queue.complete(job.id, worker_id, output):
+                    logger.error("[%s] Lease perdido, resultado del trabajo %s descartado (otro worker lo reprocesa)", worker_id, job.id)
+            except Exception as e:
+                logger.exception("[%s] Error en el trabajo %s (intento %s/%s)", worker_id, job.id, job.attempts, job.max_attempts)
+                if not queue.fail(job.id, worker_id, f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"):
+                    logger.error("[%s] Lease perdido, error del trabajo %s no registrado", worker_id, job.id)
+            finally:
+                heartbeat_stop.set()
+                heartbeat.join()
+    finally:
+        queue.close()
+        logger.info("[%s] Worker detenido", worker_id)
+
+
+def run_workers(
+    db_path: str,
+    workers: int,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    requests_per_second: float = None,
+):
+    """
+    Start `workers` worker processes and wait for them; SIGTERM/SIGINT is forwarded.
+
+    Each process has its own llm rate limiter, so the total provider budget
+    (`requests_per_second`, LLM_REQUESTS_PER_SECOND by default) is split
+    evenly between the processes.
+    """
+    # Create the schema before the workers race for it
+    JobQueue(db_path).close()
+
+    if requests_per_second is None:
+        requests_per_second = float(os.getenv("LLM_REQUESTS_PER_SECOND", "4"))
+    # Read by nodes.py when the graph is loaded in each worker process
+    os.environ["LLM_REQUESTS_PER_SECOND"] = str(requests_per_second / workers)
+
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(db_path, lease_seconds, poll_interval), name=f"worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable job queue for document processing")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite queue path (JOB_QUEUE_DB)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit = subparsers.add_parser("submit", help="queue documents")
+    submit.add_argument("files", nargs="+")
+    submit.add_argument("--tenant", default="default")
+    submit.add_argument("--priority", default="standard", choices=list(PRIORITIES))
+    submit.add_argument("--max-attempts", type=int, default=3)
+
+    status = subparsers.add_parser("status", help="show queue or job status")
+    status.add_argument("job_id", nargs="?")
+    status.add_argument("--status", dest="filter_status", help="list jobs with this status")
+
+    work = subparsers.add_parser("work", help="run worker processes")
+    work.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+    work.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    work.add_argument("--requests-per-second", type=float, help="total llm budget shared by the workers (LLM_REQUESTS_PER_SECOND)")
+
+    subparsers.add_parser("requeue-dead", help="move dead-letter jobs back to the queue")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.command == "work":
+        run_workers(args.db, args.workers, args.lease, args.poll_interval, args.requests_per_second)
+        return
+
+    queue = JobQueue(args.db)
+    try:
+        if args.command == "submit":
+            for file_path in args.files:
+                job_id = queue.submit(os.path.abspath(file_path), args.tenant, args.priority, args.max_attempts)
+                print(f"{job_id}\t{file_path}")  # noqa: T201
+        elif args.command == "status":
+            if args.job_id:
+                job = queue.get(args.job_id)
+                if job is None:
+                    raise SystemExit(f"Trabajo {args.job_id} no encontrado")
+                print(json.dumps(job, indent=2, ensure_ascii=False))  # noqa: T201
+            else:
+                print(json.dumps(queue.counts(), indent=2))  # noqa: T201
+                for job in queue.list_jobs(args.filter_status):
+                    updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["updated_at"]))
+                    print(f"{job['id']}\t{job['status']}\t{job['attempts']}\t{updated}\t{job['file_path']}")  # noqa: T201
+        elif args.command == "requeue-dead":
+            print(f"{queue.requeue_dead()} trabajos reencolados")  # noqa: T201
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from src.agent.executor import as_node, cpu_bound, io_bound, shutdown_executors
+
+
+class PipelineState(TypedDict, total=False):
+    value: int
+    cpu_pid: int
+    io_thread: str
+
+
+@cpu_bound
+def cpu_node(state: PipelineState):
+    return {"value": state["value"] * 2, "cpu_pid": os.getpid()}
+
+
+@io_bound
+def io_node(state: PipelineState):
+    return {"value": state["value"] + 1, "io_thread": threading.current_thread().name}
+
+
+def plain_node(state: PipelineState):
+    return {"value": state["value"] * 10}
+
+
+@pytest.fixture
+def pipeline():
+    builder = StateGraph(PipelineState)
+    builder.add_node("cpu_node", as_node(cpu_node, enabled=True))
+    builder.add_node("io_node", as_node(io_node, enabled=True))
+    builder.add_node("plain_node", as_node(plain_node, enabled=True))
+    builder.add_edge(START, "cpu_node")
+    builder.add_edge("cpu_node", "io_node")
+    builder.add_edge("io_node", "plain_node")
+    builder.add_edge("plain_node", END)
+    yield builder.compile()
+    shutdown_executors()
+
+
+def test_invoke_runs_nodes_inline(pipeline):
+    result = pipeline.invoke({"value": 1})
+
+    assert result["value"] == 30
+    assert result["cpu_pid"] == os.getpid()
+    assert not result["io_thread"].startswith("io-node")
+
+
+def test_ainvoke_dispatches_to_pools(pipeline):
+    result = asyncio.run(pipeline.ainvoke({"value": 1}))
+
+    assert result["value"] == 30
+    assert result["cpu_pid"] != os.getpid()
+    assert result["io_thread"].startswith("io-node")
+
+
+def test_disabled_or_unmarked_nodes_are_unchanged():
+    assert as_node(cpu_node, enabled=False) is cpu_node
+    assert as_node(plain_node, enabled=True) is plain_node
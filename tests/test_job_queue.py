@@ -0,0 +1,177 @@
+import time
+
+import pytest
+
+from src.agent.job_queue import DEAD, DONE, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), retry_backoff=10)
+    yield queue
+    queue.close()
+
+
+def test_claim_by_priority_then_submission_order(queue):
+    bulk = queue.submit("bulk.pdf", priority="bulk")
+    first = queue.submit("first.pdf")
+    second = queue.submit("second.pdf")
+    urgent = queue.submit("urgent.pdf", priority="urgent")
+
+    claimed = [queue.claim("w1", 60).id for _ in range(4)]
+    assert claimed == [urgent, first, second, bulk]
+    assert queue.claim("w1", 60) is None
+
+
+def test_claim_sets_lease_and_attempts(queue):
+    job_id = queue.submit("doc.pdf", tenant="archive", max_attempts=5)
+
+    job = queue.claim("w1", 60)
+    assert (job.id, job.file_path, job.tenant, job.attempts, job.max_attempts) == (job_id, "doc.pdf", "archive", 1, 5)
+    row = queue.get(job_id)
+    assert row["status"] == RUNNING
+    assert row["lease_owner"] == "w1"
+    assert row["lease_expires"] > time.time() + 50
+
+
+def test_running_job_is_not_claimed_twice(queue):
+    queue.submit("doc.pdf")
+    assert queue.claim("w1", 60) is not None
+    assert queue.claim("w2", 60) is None
+
+
+def test_expired_lease_is_reclaimed(queue):
+    job_id = queue.submit("doc.pdf")
+    queue.claim("w1", -1)
+
+    job = queue.claim("w2", 60)
+    assert job.id == job_id
+    assert job.attempts == 2
+    # The previous owner can no longer extend or complete the job
+    assert not queue.extend_lease(job_id, "w1", 60)
+    assert not queue.complete(job_id, "w1", {"stale": True})
+    assert queue.get(job_id)["status"] == RUNNING
+    assert queue.get(job_id)["result"] is None
+
+
+def test_expired_lease_without_attempts_is_dead_lettered(queue):
+    job_id = queue.submit("doc.pdf", max_attempts=1)
+    queue.claim("w1", -1)
+
+    assert queue.claim("w2", 60) is None
+    row = queue.get(job_id)
+    assert row["status"] == DEAD
+    assert row["last_error"] == "lease expired"
+
+
+def test_extend_lease(queue):
+    job_id = queue.submit("doc.pdf")
+    queue.claim("w1", 1)
+
+    assert queue.extend_lease(job_id, "w1", 600)
+    assert queue.get(job_id)["lease_expires"] > time.time() + 500
+
+
+def test_complete_stores_result(queue):
+    job_id = queue.submit("doc.pdf")
+    queue.claim("w1", 60)
+    assert queue.complete(job_id, "w1", {"document": {"number": "BL-1"}})
+
+    row = queue.get(job_id)
+    assert row["status"] == DONE
+    assert row["result"] == {"document": {"number": "BL-1"}}
+    assert row["lease_owner"] is None
+
+
+def test_fail_retries_with_exponential_backoff(queue):
+    job_id = queue.submit("doc.pdf", max_attempts=3)
+
+    queue.claim("w1", 60)
+    before = time.time()
+    assert queue.fail(job_id, "w1", "boom")
+    row = queue.get(job_id)
+    assert row["status"] == QUEUED
+    assert row["last_error"] == "boom"
+    assert before + 10 <= row["available_at"] <= time.time() + 10
+    # Not available until the backoff elapses
+    assert queue.claim("w1", 60) is None
+
+    queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    queue.claim("w1", 60)
+    before = time.time()
+    queue.fail(job_id, "w1", "boom")
+    assert queue.get(job_id)["available_at"] >= before + 20
+
+
+def test_fail_dead_letters_after_max_attempts(queue):
+    job_id = queue.submit("doc.pdf", max_attempts=2)
+    for _ in range(2):
+        queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+        queue.claim("w1", 60)
+        queue.fail(job_id, "w1", "boom")
+
+    assert queue.get(job_id)["status"] == DEAD
+    assert queue.counts() == {DEAD: 1}
+
+
+def test_fail_ignores_lost_lease(queue):
+    job_id = queue.submit("doc.pdf")
+    queue.claim("w1", -1)
+    queue.claim("w2", 60)
+
+    assert not queue.fail(job_id, "w1", "stale")
+    row = queue.get(job_id)
+    assert row["status"] == RUNNING
+    assert row["lease_owner"] == "w2"
+
+
+def test_requeue_dead(queue):
+    job_id = queue.submit("doc.pdf", max_attempts=1)
+    queue.claim("w1", 60)
+    queue.fail(job_id, "w1", "boom")
+    assert queue.get(job_id)["status"] == DEAD
+
+    assert queue.requeue_dead() == 1
+    job = queue.claim("w1", 60)
+    assert job.id == job_id
+    assert job.attempts == 1
+
+
+def test_queue_is_durable(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(db_path)
+    job_id = queue.submit("doc.pdf")
+    queue.close()
+
+    reopened = JobQueue(db_path)
+    try:
+        assert reopened.claim("w1", 60).id == job_id
+    finally:
+        reopened.close()
+
+
+def test_unknown_priority(queue):
+    with pytest.raises(ValueError):
+        queue.submit("doc.pdf", priority="critical")
+
+
+def test_status_listing(queue):
+    queue.submit("a.pdf")
+    queue.submit("b.pdf")
+    claimed = queue.claim("w1", 60)
+    queue.complete(claimed.id, "w1", None)
+
+    assert queue.counts() == {QUEUED: 1, DONE: 1}
+    assert [job["id"] for job in queue.list_jobs(DONE)] == [claimed.id]
+    assert len(queue.list_jobs()) == 2
+    assert queue.get("missing") is None
+
+
+def test_complete_twice_is_rejected(queue):
+    job_id = queue.submit("doc.pdf")
+    queue.claim("w1", 60)
+
+    assert queue.complete(job_id, "w1", {"first": True})
+    assert not queue.complete(job_id, "w1", {"second": True})
+    assert not queue.fail(job_id, "w1", "late")
+    assert queue.get(job_id)["result"] == {"first": True}
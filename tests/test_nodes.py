@@ -0,0 +1,147 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+# nodes.py builds the llm client at import time
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from src.agent import nodes  # noqa: E402
+from src.agent.state import OverallState  # noqa: E402
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+def fake_reader(*pages_text):
+    class FakeReader:
+        def __init__(self, file_path):
+            self.pages = [FakePage(text) for text in pages_text]
+    return FakeReader
+
+
+@pytest.fixture
+def min_chars(monkeypatch):
+    monkeypatch.setattr(nodes, "PDF_TEXT_MIN_CHARS", 10)
+
+
+def test_text_at_threshold_is_used(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader("  0123456789  "))
+    assert nodes.extract_pdf_text("doc.pdf") == "0123456789"
+
+
+def test_text_below_threshold_is_ignored(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader("012345678"))
+    assert nodes.extract_pdf_text("doc.pdf") == ""
+
+
+def test_only_first_page_is_extracted(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader("first page text", "second page text"))
+    assert nodes.extract_pdf_text("doc.pdf") == "first page text"
+
+
+def test_unreadable_or_empty_pdf(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader())
+    assert nodes.extract_pdf_text("doc.pdf") == ""
+
+    def broken_reader(file_path):
+        raise ValueError("not a pdf")
+    monkeypatch.setattr(nodes, "PdfReader", broken_reader)
+    assert nodes.extract_pdf_text("doc.pdf") == ""
+
+
+def test_digital_pdf_skips_rasterization(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader("BILL OF LADING No. BL-1"))
+    monkeypatch.setattr(nodes, "rasterize_pdf", lambda file_path: pytest.fail("rasterized a digital PDF"))
+
+    update = nodes.encode_file_to_base64(OverallState(file_path="doc.pdf"))
+    assert update == {"file_text": "BILL OF LADING No. BL-1"}
+
+
+def test_scanned_pdf_is_rasterized(monkeypatch, min_chars):
+    monkeypatch.setattr(nodes, "PdfReader", fake_reader(""))
+    monkeypatch.setattr(nodes, "rasterize_pdf", lambda file_path: f"{file_path}.png")
+
+    update = nodes.encode_file_to_base64(OverallState(file_path="doc.pdf"))
+    assert update == {"file_image_path": "doc.pdf.png"}
+
+
+def test_image_is_sent_as_is(monkeypatch):
+    monkeypatch.setattr(nodes, "PdfReader", lambda file_path: pytest.fail("read an image as PDF"))
+
+    update = nodes.encode_file_to_base64(OverallState(file_path="bol/billoflading_2.jpg"))
+    assert update == {"file_image_path": "bol/billoflading_2.jpg"}
+
+
+class FakeImage:
+    def save(self, file, format):
+        file.write(b"\x89PNG page 1")
+
+
+@pytest.fixture
+def raster_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(nodes, "RASTER_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(nodes, "convert_from_path", lambda file_path, first_page, last_page: [FakeImage()])
+    return tmp_path / "pages"
+
+
+def test_rasterized_path_is_stable(raster_dir):
+    image_path = nodes.rasterize_pdf("bol/billoflading.pdf")
+
+    assert image_path == nodes.rasterize_pdf("bol/billoflading.pdf")
+    assert image_path != nodes.rasterize_pdf("bol/other.pdf")
+    assert open(image_path, "rb").read() == b"\x89PNG page 1"
+    assert len(list(raster_dir.iterdir())) == 2
+
+
+def test_failed_vision_calls_do_not_leak_images(monkeypatch, raster_dir):
+    def failing_post(url, headers, data):
+        b"".join(data)
+        raise ConnectionError("openrouter down")
+    monkeypatch.setattr(nodes.requests, "post", failing_post)
+
+    for _ in range(3):
+        state = OverallState(file_path="bol/billoflading.pdf", file_image_path=nodes.rasterize_pdf("bol/billoflading.pdf"))
+        with pytest.raises(ConnectionError):
+            nodes.analyze_document(state)
+
+    assert list(raster_dir.iterdir()) == []
+
+
+EXTRACTION = {
+    "document": {"type": "Bill of Lading", "number": "BL-1", "date_of_issue": "", "date_of_shipment": ""},
+    "entities": [],
+    "details": {"port_of_loading": "", "port_of_discharge": "", "vessel_name": ""},
+    "cargo": {"item_name": "", "description": "", "quantity": ""},
+}
+
+
+@pytest.mark.parametrize("extraction", [EXTRACTION, {"document": {}}])
+def test_vision_call_rasterizes_again_when_image_is_missing(monkeypatch, raster_dir, extraction):
+    sent = []
+
+    class FakeResponse:
+        def json(self):
+            return {"choices": [{"message": {"content": "{}"}}]}
+
+    def post(url, headers, data):
+        sent.append(b"".join(data))
+        return FakeResponse()
+    monkeypatch.setattr(nodes.requests, "post", post)
+    monkeypatch.setattr(nodes, "process_json_response", lambda result: extraction)
+
+    # Resumed run: the image recorded in the state was already removed
+    state = OverallState(file_path="bol/billoflading.pdf", file_image_path=nodes.rasterized_path("bol/billoflading.pdf"))
+    if extraction is EXTRACTION:
+        assert nodes.analyze_document(state)["document"].number == "BL-1"
+    else:
+        with pytest.raises(ValidationError):
+            nodes.analyze_document(state)
+
+    assert len(sent) == 1
+    assert list(raster_dir.iterdir()) == []
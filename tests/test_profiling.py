@@ -0,0 +1,52 @@
+import pytest
+
+from src.agent import profiling
+from src.agent.profiling import configure_profiling, profiled
+
+
+@pytest.fixture
+def profiling_config(tmp_path):
+    saved = dict(profiling._config)
+    configure_profiling(enabled=True, sample_rate=1.0, output_dir=str(tmp_path), nodes=[])
+    yield tmp_path
+    profiling._config.clear()
+    profiling._config.update(saved)
+
+
+@profiled
+def sample_node(state):
+    return {"total": sum(len(str(i)) for i in range(state["n"]))}
+
+
+def test_runs_within_one_second_write_separate_reports(profiling_config):
+    for _ in range(3):
+        assert sample_node({"n": 1000}) == {"total": 2890}
+
+    reports = sorted(path.suffix for path in (profiling_config / "sample_node").iterdir())
+    assert reports == [".collapsed"] * 3 + [".prof"] * 3 + [".txt"] * 3
+
+
+def test_collapsed_stacks_start_at_the_node(profiling_config):
+    sample_node({"n": 1000})
+
+    collapsed = next((profiling_config / "sample_node").glob("*.collapsed")).read_text().splitlines()
+    assert collapsed
+    assert any(line.startswith("sample_node (") for line in collapsed)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in collapsed)
+
+
+def test_disabled_or_unselected_nodes_are_not_profiled(profiling_config):
+    configure_profiling(enabled=False)
+    sample_node({"n": 10})
+    configure_profiling(enabled=True, nodes=["other_node"])
+    sample_node({"n": 10})
+
+    assert not (profiling_config / "sample_node").exists()
+
+
+def test_allocation_report_states_it_is_process_wide(profiling_config):
+    sample_node({"n": 10})
+
+    report = next((profiling_config / "sample_node").glob("*.alloc.txt")).read_text()
+    assert report.startswith("node: sample_node\n")
+    assert "traced process-wide" in report
@@ -0,0 +1,73 @@
+import base64
+import json
+
+import pytest
+
+from src.agent.request_body import StreamingChatBody
+
+MODEL = "qwen/qwen2.5-vl-72b-instruct:free"
+
+
+def expected_body(prompt, data, mime_type="image/png"):
+    # Body built in memory by analyze_document before it was streamed
+    return {
+        "model": MODEL,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64.b64encode(data).decode()}"}},
+                ],
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def image(tmp_path):
+    def write(data, name="page.png"):
+        image_path = tmp_path / name
+        image_path.write_bytes(data)
+        return str(image_path)
+    return write
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 10, 299, 300, 301, 1000])
+@pytest.mark.parametrize("chunk_size", [3, 6, 300])
+def test_body_matches_json_dumps(image, size, chunk_size):
+    data = bytes(range(256)) * (size // 256) + bytes(range(size % 256))
+    body = StreamingChatBody("Analyze «this» image", image(data), model=MODEL, chunk_size=chunk_size)
+
+    raw = b"".join(body)
+    assert len(body) == len(raw)
+    assert json.loads(raw) == expected_body("Analyze «this» image", data)
+
+
+def test_body_can_be_iterated_twice(image):
+    body = StreamingChatBody("prompt", image(b"x" * 1000), model=MODEL, chunk_size=300)
+    assert b"".join(body) == b"".join(body)
+
+
+def test_mime_type(image):
+    jpeg = StreamingChatBody("prompt", image(b"jpeg", "scan.jpg"), model=MODEL)
+    unknown = StreamingChatBody("prompt", image(b"raw", "scan.bin"), model=MODEL)
+    forced = StreamingChatBody("prompt", image(b"raw", "scan.bin"), model=MODEL, mime_type="image/webp")
+
+    assert json.loads(b"".join(jpeg)) == expected_body("prompt", b"jpeg", "image/jpeg")
+    assert json.loads(b"".join(unknown)) == expected_body("prompt", b"raw", "image/jpeg")
+    assert json.loads(b"".join(forced)) == expected_body("prompt", b"raw", "image/webp")
+
+
+def test_prompt_containing_placeholder(image):
+    prompt = "Replace __FILE_BASE64__ with the data"
+    body = StreamingChatBody(prompt, image(b"image data"), model=MODEL)
+
+    raw = b"".join(body)
+    assert len(body) == len(raw)
+    assert json.loads(raw) == expected_body(prompt, b"image data")
+
+
+def test_chunk_size_must_be_multiple_of_3(image):
+    with pytest.raises(ValueError):
+        StreamingChatBody("prompt", image(b"data"), model=MODEL, chunk_size=4)
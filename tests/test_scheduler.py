@@ -0,0 +1,162 @@
+import time
+
+import pytest
+
+from src.agent.scheduler import AdmissionError, Job, JobScheduler
+
+
+def unlimited_scheduler(**kwargs):
+    return JobScheduler(requests_per_second=1000, max_bucket_size=1000, **kwargs)
+
+
+def drain(scheduler):
+    order = []
+    while True:
+        job = scheduler.next_job(timeout=0)
+        if job is None:
+            return order
+        order.append(job.file_path)
+
+
+def test_priority_classes_are_served_in_order():
+    scheduler = unlimited_scheduler()
+    scheduler.submit(Job("bulk", priority="bulk"))
+    scheduler.submit(Job("standard", priority="standard"))
+    scheduler.submit(Job("urgent", priority="urgent"))
+
+    assert drain(scheduler) == ["urgent", "standard", "bulk"]
+
+
+def test_fifo_within_tenant_without_deadlines():
+    scheduler = unlimited_scheduler()
+    for i in range(3):
+        scheduler.submit(Job(f"doc{i}"))
+
+    assert drain(scheduler) == ["doc0", "doc1", "doc2"]
+
+
+def test_tenant_weights_share_dispatches():
+    scheduler = unlimited_scheduler(tenant_weights={"a": 3, "b": 1})
+    for i in range(12):
+        scheduler.submit(Job(f"a{i}", tenant="a"))
+        scheduler.submit(Job(f"b{i}", tenant="b"))
+
+    first = drain(scheduler)[:8]
+    assert sum(name.startswith("a") for name in first) == 6
+    assert sum(name.startswith("b") for name in first) == 2
+
+
+def test_returning_tenant_does_not_keep_idle_credit():
+    scheduler = unlimited_scheduler()
+    for i in range(4):
+        scheduler.submit(Job(f"a{i}", tenant="a"))
+    drain(scheduler)
+    scheduler.submit(Job("a4", tenant="a"))
+    scheduler.submit(Job("b0", tenant="b"))
+    scheduler.submit(Job("b1", tenant="b"))
+
+    # b starts at a's virtual time, so it does not get the 4 dispatches a already had
+    assert drain(scheduler) == ["a4", "b0", "b1"]
+
+
+def test_deadline_jumps_ahead_of_higher_classes():
+    scheduler = unlimited_scheduler(deadline_slack=60)
+    scheduler.submit(Job("urgent", priority="urgent"))
+    scheduler.submit(Job("bulk_due", priority="bulk", deadline=time.time() + 30))
+    scheduler.submit(Job("bulk_later", priority="bulk", deadline=time.time() + 3600))
+
+    assert drain(scheduler) == ["bulk_due", "urgent", "bulk_later"]
+
+
+def test_earliest_deadline_first_within_tenant():
+    scheduler = unlimited_scheduler(deadline_slack=0)
+    scheduler.submit(Job("late", deadline=time.time() + 3600))
+    scheduler.submit(Job("soon", deadline=time.time() + 600))
+    scheduler.submit(Job("none"))
+
+    assert drain(scheduler) == ["soon", "late", "none"]
+
+
+def test_rejects_cost_above_bucket_size():
+    scheduler = JobScheduler(requests_per_second=4, max_bucket_size=10)
+    with pytest.raises(AdmissionError):
+        scheduler.submit(Job("big", cost=11))
+
+    scheduler.submit(Job("ok", cost=2))
+    assert scheduler.next_job(timeout=1).file_path == "ok"
+    assert scheduler.metrics()["rejected"] == {"cost_exceeds_budget": 1}
+
+
+def test_rejects_when_queue_is_full():
+    scheduler = unlimited_scheduler(max_queue_depth=2)
+    scheduler.submit(Job("a"))
+    scheduler.submit(Job("b"))
+    with pytest.raises(AdmissionError):
+        scheduler.submit(Job("c"))
+
+    assert scheduler.metrics()["rejected"] == {"queue_full": 1}
+
+
+def test_rejects_unreachable_deadline():
+    scheduler = JobScheduler(requests_per_second=1, max_bucket_size=2)
+    for i in range(3):
+        scheduler.submit(Job(f"doc{i}", cost=2))
+    with pytest.raises(AdmissionError):
+        scheduler.submit(Job("due", cost=2, deadline=time.time() + 5))
+
+    # Lower classes do not count against an urgent deadline
+    scheduler.submit(Job("urgent_due", priority="urgent", cost=2, deadline=time.time() + 5))
+    assert scheduler.metrics()["rejected"] == {"deadline_unreachable": 1}
+
+
+def test_rejects_after_close():
+    scheduler = unlimited_scheduler()
+    scheduler.close()
+    with pytest.raises(AdmissionError):
+        scheduler.submit(Job("doc"))
+    assert scheduler.next_job(timeout=0) is None
+
+
+def test_unknown_priority():
+    with pytest.raises(ValueError):
+        unlimited_scheduler().submit(Job("doc", priority="critical"))
+
+
+def test_dispatch_is_paced_by_rate_budget():
+    scheduler = JobScheduler(requests_per_second=10, max_bucket_size=2)
+    scheduler.submit(Job("a", cost=2))
+    scheduler.submit(Job("b", cost=2))
+
+    assert scheduler.next_job(timeout=0).file_path == "a"
+    assert scheduler.next_job(timeout=0) is None
+    start = time.monotonic()
+    assert scheduler.next_job(timeout=1).file_path == "b"
+    assert time.monotonic() - start >= 0.1
+
+
+def test_metrics():
+    scheduler = unlimited_scheduler()
+    scheduler.submit(Job("a", tenant="x", priority="urgent"))
+    scheduler.submit(Job("b", tenant="y"))
+    scheduler.submit(Job("c", tenant="y", deadline=time.time() + 0.05))
+
+    metrics = scheduler.metrics()
+    assert metrics["queue_depth"] == {"urgent": 1, "standard": 2}
+    assert metrics["queue_depth_by_tenant"] == {"x": 1, "y": 2}
+
+    def handler(job):
+        if job.file_path == "b":
+            raise RuntimeError("boom")
+
+    time.sleep(0.1)
+    scheduler.close()
+    scheduler.run(handler, workers=2)
+
+    metrics = scheduler.metrics()
+    assert metrics["queue_depth"] == {}
+    assert metrics["queue_depth_by_tenant"] == {}
+    assert metrics["wait_time"]["urgent"]["count"] == 1
+    assert metrics["wait_time"]["standard"]["count"] == 2
+    assert metrics["wait_time"]["standard"]["max"] >= metrics["wait_time"]["standard"]["p50"] >= 0
+    assert metrics["failed"] == {"standard": 1}
+    assert metrics["deadline_missed"] == 1
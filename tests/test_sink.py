@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from src.agent.sink import ResultSink, flatten_result
+from src.agent.state import OverallStateOutput
+
+RESULT = {
+    "document": {"type": "Bill of Lading", "number": "BL-1", "date_of_issue": "01/02/2024", "date_of_shipment": None},
+    "entities": [{"name": "ACME", "role": "Shipper"}],
+    "individuals": [],
+    "details": {"port_of_loading": "Valparaiso", "port_of_discharge": "Rotterdam", "vessel_name": "MSC Anna"},
+    "cargo": {"item_name": "Copper", "description": "Copper cathodes", "quantity": "20"},
+}
+
+
+def read_ndjson(file_path):
+    with open(file_path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_flatten_result_columns():
+    row = flatten_result(RESULT, file_path="bol/billoflading.pdf")
+
+    assert row["file_path"] == "bol/billoflading.pdf"
+    assert row["document_number"] == "BL-1"
+    assert row["details_vessel_name"] == "MSC Anna"
+    assert row["details_freight"] is None
+    assert row["cargo_incoterm"] is None
+    assert row["entities"][0]["name"] == "ACME"
+    assert row["entities"][0]["email"] is None
+    assert row["individuals"] == []
+    assert set(row) == (
+        {"file_path", "processed_at", "entities", "individuals"}
+        | {f"document_{name}" for name in ("type", "number", "date_of_issue", "date_of_shipment")}
+        | {
+            f"details_{name}"
+            for name in (
+                "place_of_receipt", "port_of_loading", "port_of_discharge", "vessel_name", "place_of_delivery",
+                "container", "gross_weight", "measurement", "freight",
+            )
+        }
+        | {
+            f"cargo_{name}"
+            for name in ("item_name", "description", "quantity", "packing_list", "incoterm", "additional_notes")
+        }
+    )
+
+
+def test_flatten_result_accepts_dict_or_model():
+    from_dict = flatten_result(RESULT)
+    from_model = flatten_result(OverallStateOutput.model_validate(RESULT))
+
+    from_dict.pop("processed_at")
+    from_model.pop("processed_at")
+    assert from_dict == from_model
+
+
+def test_flatten_result_rejects_interrupted_result():
+    with pytest.raises(ValueError, match="batch_graph"):
+        flatten_result({**RESULT, "__interrupt__": ["review"]})
+
+
+def test_ndjson_appends_across_sinks(tmp_path):
+    ndjson_path = tmp_path / "out" / "results.ndjson"
+    for file_path in ("a.pdf", "b.pdf"):
+        with ResultSink(ndjson_path=str(ndjson_path)) as sink:
+            sink.write(RESULT, file_path=file_path)
+
+    assert [row["file_path"] for row in read_ndjson(ndjson_path)] == ["a.pdf", "b.pdf"]
+
+
+def test_flush_every(tmp_path):
+    ndjson_path = tmp_path / "results.ndjson"
+    sink = ResultSink(ndjson_path=str(ndjson_path), flush_every=2, flush_interval=3600)
+
+    sink.write(RESULT, file_path="a.pdf")
+    assert not ndjson_path.exists()
+    sink.write(RESULT, file_path="b.pdf")
+    assert len(read_ndjson(ndjson_path)) == 2
+
+    sink.write(RESULT, file_path="c.pdf")
+    assert len(read_ndjson(ndjson_path)) == 2
+    sink.close()
+    assert len(read_ndjson(ndjson_path)) == 3
+
+
+def test_flush_interval_is_checked_on_write(tmp_path):
+    ndjson_path = tmp_path / "results.ndjson"
+    sink = ResultSink(ndjson_path=str(ndjson_path), flush_every=100, flush_interval=0)
+
+    sink.write(RESULT, file_path="a.pdf")
+    assert len(read_ndjson(ndjson_path)) == 1
+
+
+def test_flush_settings_read_at_init(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_SINK_FLUSH_EVERY", "7")
+    sink = ResultSink(ndjson_path=str(tmp_path / "results.ndjson"))
+    assert sink.flush_every == 7
+
+
+def test_requires_an_output():
+    with pytest.raises(ValueError):
+        ResultSink()
+
+
+def test_parquet_part_per_flush(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    parquet_dir = tmp_path / "results"
+
+    with ResultSink(parquet_dir=str(parquet_dir), flush_every=1) as sink:
+        sink.write(RESULT, file_path="a.pdf")
+        sink.write(RESULT, file_path="b.pdf")
+
+    assert len(list(parquet_dir.glob("part-*.parquet"))) == 2
+    table = pq.read_table(str(parquet_dir))
+    assert sorted(table.column("file_path").to_pylist()) == ["a.pdf", "b.pdf"]
+    assert table.column("entities").to_pylist()[0][0]["name"] == "ACME"
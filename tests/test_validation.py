@@ -0,0 +1,133 @@
+import copy
+import gc
+import json
+import weakref
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from src.agent.prompts import OCR_PROMPT
+from src.agent.state import DEFAULT_EXTRACTION_SCHEMA, DocumentAnalysis, extraction_skeleton
+from src.agent.validation import get_structured_llm, validate_extraction, validate_extractions, validate_extractions_json
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+EXTRACTION = {
+    "document": {"type": "Bill of Lading", "number": "BL-1", "date_of_issue": "01/02/2024", "date_of_shipment": ""},
+    "entities": [{"name": "ACME", "role": "Shipper"}],
+    "details": {"port_of_loading": "Valparaiso", "port_of_discharge": "Rotterdam", "vessel_name": "MSC Anna"},
+    "cargo": {"item_name": "Copper", "description": "Copper cathodes", "quantity": "20"},
+}
+
+
+def schema_shape(schema):
+    """
+    Part of a JSON schema that function calling depends on: types, properties, items and required
+    """
+    shape = {key: schema[key] for key in ("type", "required") if key in schema}
+    if "properties" in schema:
+        shape["properties"] = {name: schema_shape(value) for name, value in schema["properties"].items()}
+    if "items" in schema:
+        shape["items"] = schema_shape(schema["items"])
+    return shape
+
+
+def test_extraction_schema_matches_baseline():
+    # Fixture: hand-written DEFAULT_EXTRACTION_SCHEMA before it was derived from the models
+    baseline = json.loads((FIXTURES / "extraction_schema.json").read_text(encoding="utf-8"))
+
+    assert schema_shape(DEFAULT_EXTRACTION_SCHEMA) == schema_shape(baseline)
+    assert "$defs" not in json.dumps(DEFAULT_EXTRACTION_SCHEMA)
+    assert "$ref" not in json.dumps(DEFAULT_EXTRACTION_SCHEMA)
+    assert "anyOf" not in json.dumps(DEFAULT_EXTRACTION_SCHEMA)
+
+
+def test_ocr_prompt_matches_baseline():
+    # Fixture: hand-written OCR_PROMPT before the skeleton was built from the models
+    baseline = (FIXTURES / "ocr_prompt.txt").read_text(encoding="utf-8")
+    assert OCR_PROMPT == baseline
+
+
+def test_skeleton_has_every_model_field():
+    skeleton = extraction_skeleton()
+
+    assert set(skeleton) == set(DocumentAnalysis.model_fields)
+    assert skeleton["document"]["type"] == "Bill of Lading"
+    assert skeleton["details"]["freight"] == ""
+    assert set(skeleton["entities"][0]) == {"name", "role", "address", "city", "country", "postal_code", "phone", "email"}
+
+
+def test_validate_extraction_defaults():
+    analysis = validate_extraction(EXTRACTION)
+
+    assert analysis.document.number == "BL-1"
+    assert analysis.entities[0].address is None
+    assert analysis.individuals == []
+    assert analysis.cargo.incoterm is None
+
+
+def test_validate_extraction_requires_sections():
+    with pytest.raises(ValidationError):
+        validate_extraction({key: value for key, value in EXTRACTION.items() if key != "cargo"})
+
+
+def test_validate_extractions():
+    second = {**EXTRACTION, "document": {**EXTRACTION["document"], "number": "BL-2"}}
+
+    analyses = validate_extractions([EXTRACTION, second])
+    assert [analysis.document.number for analysis in analyses] == ["BL-1", "BL-2"]
+
+    with pytest.raises(ValidationError):
+        validate_extractions([EXTRACTION, {"document": {}}])
+
+
+def test_validate_extractions_json():
+    data = json.dumps([EXTRACTION, EXTRACTION]).encode("utf-8")
+
+    analyses = validate_extractions_json(data)
+    assert len(analyses) == 2
+    assert analyses[1] == validate_extraction(EXTRACTION)
+
+    with pytest.raises(ValidationError):
+        validate_extractions_json(b"[{]")
+
+
+class FakeLLM:
+    def __init__(self):
+        self.built = 0
+
+    def with_structured_output(self, schema):
+        self.built += 1
+        # Like the real runnable, it references the llm
+        return {"llm": self, "schema": schema}
+
+
+def test_structured_llm_is_memoized_per_llm_and_schema():
+    llm, other = FakeLLM(), FakeLLM()
+    schema = {"title": "A", "type": "object"}
+
+    assert get_structured_llm(llm, schema) is get_structured_llm(llm, dict(schema))
+    assert get_structured_llm(llm, {"title": "B", "type": "object"})["schema"]["title"] == "B"
+    assert llm.built == 2
+    assert get_structured_llm(other, schema)["llm"] is other
+
+
+def test_structured_llm_of_a_copy_is_not_shared():
+    llm = FakeLLM()
+    schema = {"title": "A", "type": "object"}
+    get_structured_llm(llm, schema)
+
+    copied = copy.copy(llm)
+    assert get_structured_llm(copied, schema)["llm"] is copied
+    assert get_structured_llm(llm, schema)["llm"] is llm
+
+
+def test_structured_llm_cache_does_not_keep_llm_alive():
+    llm = FakeLLM()
+    get_structured_llm(llm, {"title": "A", "type": "object"})
+    ref = weakref.ref(llm)
+
+    del llm
+    gc.collect()
+    assert ref() is None